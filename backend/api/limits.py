@@ -0,0 +1,28 @@
+from fastapi import HTTPException
+import asyncio
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of in-flight requests for an endpoint within one process.
+    
+    Requests beyond the limit wait for a free slot for up to `timeout`
+    seconds and are then rejected with HTTP 429, so overload is shed
+    instead of piling up pending upstream calls.
+    """
+
+    def __init__(self, limit: int, timeout: float):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._timeout = timeout
+        self.inflight = 0
+
+    async def __aenter__(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=429, detail="Too many concurrent requests, please retry later")
+        self.inflight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.inflight -= 1
+        self._semaphore.release()
@@ -1,53 +1,158 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from openai import NotFoundError
 from backend.core.models import (
     EmailRequest, AnalysisResponse, TaskRequest, TaskResponse,
-    MeetingRequest, MeetingScheduleResponse, EmailProcessResponse
+    MeetingRequest, MeetingScheduleResponse, EmailProcessResponse, TaskBatchResponse
 )
-from backend.core.ai import analyze_email, create_task, schedule_meeting
-from typing import List
+from backend.core.ai import analyze_email, execute_action, create_task, submit_task_batch, get_task_batch, schedule_meeting
+from backend.core.llm_cache import llm_cache
+from backend.core.config import MAX_CONCURRENT_REQUESTS, BACKPRESSURE_TIMEOUT
+from backend.api.limits import ConcurrencyLimiter
+from typing import Any, Dict, List
+import asyncio
 import logging
+import structlog
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Configure logging: JSON events, with records below INFO dropped before any formatting
+structlog.configure(
+    processors=[
+        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.JSONRenderer()
+    ],
+    wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+    cache_logger_on_first_use=True
+)
+logger = structlog.get_logger(__name__)
+
+# Response models are built with model_construct: their contents come from
+# our own code, and FastAPI still checks them against response_model.
+
+# Health probe bodies never change, so they are serialized once at import time
+_HEALTH = Response(
+    content=b'{"status":"healthy","service":"task-automator-api"}',
+    media_type="application/json"
+)
+_NOT_READY = Response(
+    content=b'{"status":"starting","service":"task-automator-api"}',
+    status_code=503,
+    media_type="application/json"
+)
+
+# Per-endpoint caps on concurrent upstream LLM calls; these live in each worker
+# process, so MAX_CONCURRENT_REQUESTS is already this worker's share of the total
+_EMAIL_LIMIT = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS, BACKPRESSURE_TIMEOUT)
+_TASK_LIMIT = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS, BACKPRESSURE_TIMEOUT)
+_MEETING_LIMIT = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS, BACKPRESSURE_TIMEOUT)
 
 # Create API router
-api_router = APIRouter(prefix="/api/v1", tags=["task-automator"])
+api_router = APIRouter(prefix="/api/v1", tags=["task-automator"], default_response_class=ORJSONResponse)
 
-@api_router.post("/analyze-email", response_model=EmailProcessResponse)
-async def analyze_email_endpoint(request: EmailRequest):
-    """Analyze email content and determine required actions."""
+async def _execute_action(client, action: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a planned action under the same limit as its own endpoint."""
+    limit = _TASK_LIMIT if action["type"] == "create_task" else _MEETING_LIMIT
     try:
-        result = await analyze_email(request.email_text)
-        return EmailProcessResponse(
-            analysis=result.get("analysis", ""),
-            actions_taken=result.get("actions", [])
-        )
-    except Exception as e:
-        logger.error(f"Error analyzing email: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        async with limit:
+            return await execute_action(client, action)
+    except HTTPException as e:
+        return {**action, "error": e.detail}
+
+@api_router.post("/analyze-email", response_model=EmailProcessResponse)
+async def analyze_email_endpoint(request: EmailRequest, http_request: Request):
+    """Analyze email content and determine required actions, optionally carrying them out."""
+    client = http_request.app.state.openai
+    async with _EMAIL_LIMIT:
+        try:
+            result = await analyze_email(client, request.email_text)
+        except Exception as e:
+            logger.error("email_analyze_failed", error=str(e))
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # Follow-up calls for the planned actions run concurrently
+    actions = result.get("actions", [])
+    if request.execute_actions and actions:
+        actions = list(await asyncio.gather(*[_execute_action(client, action) for action in actions]))
+    return EmailProcessResponse.model_construct(
+        analysis=result.get("analysis", ""),
+        actions_taken=actions
+    )
 
 @api_router.post("/create-task", response_model=TaskResponse)
-async def create_task_endpoint(request: TaskRequest):
+async def create_task_endpoint(request: TaskRequest, http_request: Request):
     """Create a new task from the request."""
+    async with _TASK_LIMIT:
+        try:
+            result = await create_task(http_request.app.state.openai, request)
+            return TaskResponse.model_construct(**result)
+        except Exception as e:
+            logger.error("task_create_failed", error=str(e))
+            raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/create-task-bulk", response_model=TaskBatchResponse, status_code=202)
+async def create_task_bulk_endpoint(requests: List[TaskRequest], http_request: Request):
+    """Submit many tasks through the OpenAI Batch API; poll GET /create-task-bulk/{batch_id} for the tasks."""
+    if not requests:
+        raise HTTPException(status_code=400, detail="No tasks to create")
     try:
-        result = await create_task(request)
-        return TaskResponse(**result)
+        result = await submit_task_batch(http_request.app.state.openai, requests)
+        return TaskBatchResponse.model_construct(**result)
     except Exception as e:
-        logger.error(f"Error creating task: {str(e)}")
+        logger.error("task_bulk_create_failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/schedule-meeting", response_model=MeetingScheduleResponse)
-async def schedule_meeting_endpoint(request: MeetingRequest):
-    """Schedule a meeting based on the request."""
+@api_router.get("/create-task-bulk/{batch_id}", response_model=TaskBatchResponse)
+async def task_bulk_status_endpoint(batch_id: str, http_request: Request):
+    """Report the status of a bulk task batch, with its tasks once it has completed."""
     try:
-        result = await schedule_meeting(request)
-        return MeetingScheduleResponse(**result)
+        result = await get_task_batch(http_request.app.state.openai, batch_id)
+    except (LookupError, NotFoundError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error scheduling meeting: {str(e)}")
+        logger.error("task_bulk_status_failed", batch_id=batch_id, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if "tasks" in result:
+        result["tasks"] = [TaskResponse.model_construct(**task) for task in result["tasks"]]
+    return TaskBatchResponse.model_construct(**result)
+
+@api_router.post("/schedule-meeting", response_model=MeetingScheduleResponse)
+async def schedule_meeting_endpoint(request: MeetingRequest, http_request: Request):
+    """Schedule a meeting based on the request."""
+    async with _MEETING_LIMIT:
+        try:
+            result = await schedule_meeting(http_request.app.state.openai, request)
+            return MeetingScheduleResponse.model_construct(**result)
+        except Exception as e:
+            logger.error("meeting_schedule_failed", error=str(e))
+            raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "task-automator-api"} 
\ No newline at end of file
+    return _HEALTH
+
+@api_router.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests."""
+    return _HEALTH
+
+@api_router.get("/health/ready")
+async def readiness_check(http_request: Request):
+    """Readiness probe: startup warm-up (loading the tokenizer) has finished."""
+    loader = getattr(http_request.app.state, "tokenizer_loader", None)
+    if loader is None or not loader.done():
+        return _NOT_READY
+    return _HEALTH
+
+@api_router.get("/stats")
+async def stats():
+    """Runtime counters for the LLM response cache and in-flight requests."""
+    return {
+        "llm_cache": llm_cache.stats(),
+        "inflight": {
+            "analyze_email": _EMAIL_LIMIT.inflight,
+            "create_task": _TASK_LIMIT.inflight,
+            "schedule_meeting": _MEETING_LIMIT.inflight
+        }
+    } 
\ No newline at end of file
@@ -1,26 +1,29 @@
-from .config import openai_client, MODEL_ID
-from .models import EmailRequest, MeetingRequest, TaskRequest, EmailAnalysisResponse  # Import EmailAnalysisResponse from models.py
-import json
-from typing import Dict, Any, List
-from datetime import datetime
+from .config import (
+    MODEL_ID, MODEL_CONTEXT_TOKENS, MAX_INPUT_TOKENS,
+    EMAIL_ANALYSIS_MAX_TOKENS, EMAIL_BATCH_SIZE, EMAIL_BATCH_TIMEOUT_MS, EMAIL_BATCH_MAX_TOKENS,
+    TASK_BATCH_DIR, TOKENIZER_LOAD_TIMEOUT
+)
+from .llm_cache import llm_cache
+from .batching import DynamicBatcher
+from .json_stream import JsonStreamScanner
+from .models import (
+    EmailRequest, MeetingRequest, TaskRequest, EmailAnalysisResponse,
+    EmailAnalysisResult, EmailAnalysisBatchResult, MeetingAnalysisResult
+)
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
+from openai import AsyncOpenAI
 import asyncio
-import logging
+import orjson
+import os
+import structlog
+import tiktoken
+import uuid
 
-logger = logging.getLogger(__name__)
+logger = structlog.get_logger(__name__)
 
-async def analyze_email(email_text: str) -> Dict[str, Any]:
-    """
-    Analyze email content using the fine-tuned GPT model to determine required actions.
-    
-    Args:
-        email_text: The full email text to analyze
-        
-    Returns:
-        Dictionary containing analysis and suggested actions
-    """
-    try:
-        # Create the prompt for email analysis
-        system_prompt = """You are an AI assistant that analyzes emails and determines what actions need to be taken. 
+# Prompts are built once at import time; only the per-request parts are filled in per call
+_EMAIL_SYS_PROMPT = """You are an AI assistant that analyzes emails and determines what actions need to be taken. 
         You can identify if an email requires:
         1. Meeting scheduling
         2. Task creation
@@ -43,204 +46,642 @@ async def analyze_email(email_text: str) -> Dict[str, Any]:
                 "priority": "Low|Medium|High|Urgent"
             }
         }"""
+_EMAIL_SYS_MSG = {"role": "system", "content": _EMAIL_SYS_PROMPT}
+_USER_TMPL = "Analyze this email:\n\n%s"
+_BATCH_USER_TMPL = (
+    "Analyze each of these emails separately. Respond with a JSON object "
+    "{\"results\": [...]} containing one object per email, each with an "
+    "additional \"id\" field matching the email id:\n\n%s"
+)
+_EMAIL_TAG_TMPL = '<email id="%d">\n%s\n</email>'
+
+_TASK_ENHANCEMENT_TMPL = """Enhance this task description to be more specific and actionable:
+        
+        Original: {description}
+        Assigned to: {assigned_to}
+        Deadline: {deadline}
+        Priority: {priority}
+        
+        Provide an enhanced description that includes:
+        1. Clear objectives
+        2. Specific deliverables
+        3. Success criteria
+        4. Any dependencies or prerequisites
+        
+        Return only the enhanced description."""
+
+_MEETING_ANALYSIS_TMPL = """Analyze this meeting request and provide scheduling recommendations:
+        
+        Organizer: {organizer}
+        Attendees: {attendees}
+        Proposed dates: {proposed_dates}
+        Duration: {duration}
+        
+        Provide recommendations for:
+        1. Best meeting time from the proposed dates
+        2. Meeting agenda suggestions
+        3. Preparation requirements
+        4. Follow-up actions
         
-        response = await asyncio.to_thread(
-            openai_client.chat.completions.create,
+        Return as JSON:
+        {{
+            "recommendation": "analysis text",
+            "best_date": "YYYY-MM-DD",
+            "suggested_time": "HH:MM",
+            "agenda": ["item1", "item2"],
+            "preparation": ["prep1", "prep2"],
+            "follow_up": ["action1", "action2"]
+        }}"""
+
+# Set by load_tokenizer() at startup; while it is None, local token budgeting is skipped
+_tokenizer: Optional[tiktoken.Encoding] = None
+# Token counts of the fixed parts of the email prompts, also set by load_tokenizer()
+_email_prompt_tokens = 0
+_batch_prompt_tokens = 0
+_email_tag_tokens = 0
+
+def _read_tokenizer() -> tiktoken.Encoding:
+    """Load the tokenizer for MODEL_ID; the first load downloads its BPE file."""
+    try:
+        return tiktoken.encoding_for_model(MODEL_ID)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+async def load_tokenizer() -> bool:
+    """
+    Load the tokenizer in a worker thread so its download never blocks the event loop.
+    
+    Returns:
+        True if the tokenizer is available, False if it could not be loaded
+    """
+    global _tokenizer, _email_prompt_tokens, _batch_prompt_tokens, _email_tag_tokens
+    try:
+        tokenizer = await asyncio.wait_for(asyncio.to_thread(_read_tokenizer), TOKENIZER_LOAD_TIMEOUT)
+    except Exception as e:
+        logger.warning("tokenizer_unavailable", error=str(e) or type(e).__name__)
+        return False
+    
+    # Emails are counted once when truncated; only these fixed parts are added per prompt
+    _tokenizer = tokenizer
+    _email_prompt_tokens = _count_tokens(_email_messages(""))
+    _batch_prompt_tokens = _count_tokens([_EMAIL_SYS_MSG, {"role": "user", "content": _BATCH_USER_TMPL % ""}])
+    _email_tag_tokens = len(_tokenizer.encode("\n\n" + _EMAIL_TAG_TMPL % (0, ""), disallowed_special=()))
+    return True
+
+def _count_tokens(messages: List[Dict[str, str]]) -> Optional[int]:
+    """Count prompt tokens, including the per-message chat format overhead, or None without a tokenizer."""
+    if _tokenizer is None:
+        return None
+    return sum(
+        len(_tokenizer.encode(message["content"], disallowed_special=())) + 4
+        for message in messages
+    ) + 3
+
+def _truncate_middle(text: str, limit: int) -> Tuple[str, Optional[int]]:
+    """
+    Trim text to at most limit tokens, keeping its head and tail.
+    
+    Args:
+        text: Text to trim
+        limit: Maximum number of tokens to keep
+        
+    Returns:
+        The original text, or its head and tail joined by an ellipsis, and its
+        token count; text is returned unchanged with no count if the tokenizer
+        is not loaded
+    """
+    if _tokenizer is None:
+        return text, None
+    tokens = _tokenizer.encode(text, disallowed_special=())
+    if len(tokens) <= limit:
+        return text, len(tokens)
+    
+    logger.warning("input_truncated", tokens=len(tokens), limit=limit)
+    head = limit // 2
+    tail = limit - head
+    # Count the ellipsis on its own rather than re-encoding the whole result
+    ellipsis = "\n...\n"
+    tokens_kept = limit + len(_tokenizer.encode(ellipsis))
+    return _tokenizer.decode(tokens[:head]) + ellipsis + _tokenizer.decode(tokens[-tail:]), tokens_kept
+
+async def _complete(client: AsyncOpenAI, messages: List[Dict[str, str]], temperature: float,
+                    max_tokens: int, stream_json: bool = False, use_cache: bool = True,
+                    prompt_tokens: Optional[int] = None) -> str:
+    """
+    Run a chat completion through the response cache.
+    
+    Args:
+        client: Shared OpenAI client
+        messages: Chat messages to send to the model
+        temperature: Sampling temperature
+        max_tokens: Maximum number of tokens to generate
+        stream_json: Request a JSON object response, stream it, and stop
+            reading once the top-level object is complete
+        use_cache: Look up and store the response in the response cache
+        prompt_tokens: Token count of messages, if the caller already has it;
+            counted here otherwise
+        
+    Returns:
+        The content of the first completion choice
+        
+    Raises:
+        ValueError: If the prompt alone fills the model's context window
+    """
+    key = llm_cache.cache_key(MODEL_ID, messages, temperature) if use_cache else None
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # Reject oversized prompts locally and never ask for more tokens than fit
+    if prompt_tokens is None:
+        prompt_tokens = _count_tokens(messages)
+    if prompt_tokens is not None:
+        if prompt_tokens >= MODEL_CONTEXT_TOKENS:
+            raise ValueError(
+                f"Prompt is {prompt_tokens} tokens, which exceeds the {MODEL_CONTEXT_TOKENS}-token context window"
+            )
+        max_tokens = min(max_tokens, MODEL_CONTEXT_TOKENS - prompt_tokens)
+    
+    if stream_json:
+        stream = await client.chat.completions.create(
             model=MODEL_ID,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this email:\n\n{email_text}"}
-            ],
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        scanner = JsonStreamScanner()
+        finish_reason = None
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                if choice.delta.content and scanner.feed(choice.delta.content):
+                    break
+        finally:
+            # Drop any trailing tokens once the JSON value has closed
+            await stream.response.aclose()
+        
+        content = scanner.text()
+        # A stream cut off by max_tokens never closes its JSON value; don't replay it from the cache
+        if scanner.complete and finish_reason != "length":
+            await llm_cache.set(key, content)
+        return content
+    
+    response = await client.chat.completions.create(
+        model=MODEL_ID,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+    content = response.choices[0].message.content
+    if response.choices[0].finish_reason != "length":
+        await llm_cache.set(key, content)
+    return content
+
+def _email_messages(email_text: str) -> List[Dict[str, str]]:
+    """Build the single-email analysis prompt."""
+    return [_EMAIL_SYS_MSG, {"role": "user", "content": _USER_TMPL % email_text}]
+
+async def _analyze_one(client: AsyncOpenAI, email_text: str, tokens: Optional[int]) -> EmailAnalysisResult:
+    """Analyze one email with its own model call."""
+    content = await _complete(
+        client=client,
+        messages=_email_messages(email_text),
+        temperature=0.1,
+        max_tokens=EMAIL_ANALYSIS_MAX_TOKENS,
+        stream_json=True,
+        use_cache=False,
+        prompt_tokens=None if tokens is None else _email_prompt_tokens + tokens
+    )
+    return EmailAnalysisResult.model_validate_json(content)
+
+async def _analyze_batch(jobs: List[Tuple[AsyncOpenAI, str, Optional[int]]]) -> List[Any]:
+    """
+    Analyze a batch of emails with a single model call.
+    
+    Concurrent analyze_email calls arriving within the batching window are
+    coalesced here by _email_batcher. A batch of one uses the plain
+    single-email prompt. Emails the batched response does not answer are
+    retried on their own, so one bad answer never fails the whole batch.
+    
+    Args:
+        jobs: (client, email text, token count) triples to analyze; all jobs
+            come from the same application, so the first client is used for
+            the call
+        
+    Returns:
+        Email analyses in the same order as jobs, with the exception in place
+        of any email whose retry failed
+    """
+    client = jobs[0][0]
+    email_texts = [email_text for _, email_text, _ in jobs]
+    email_tokens = [tokens for _, _, tokens in jobs]
+    if len(email_texts) == 1:
+        return [await _analyze_one(client, email_texts[0], email_tokens[0])]
+    
+    emails = "\n\n".join(_EMAIL_TAG_TMPL % (i, text) for i, text in enumerate(email_texts))
+    prompt_tokens = None
+    if None not in email_tokens:
+        prompt_tokens = _batch_prompt_tokens + sum(tokens + _email_tag_tokens for tokens in email_tokens)
+    by_id: Dict[int, Any] = {}
+    try:
+        content = await _complete(
+            client=client,
+            messages=[_EMAIL_SYS_MSG, {"role": "user", "content": _BATCH_USER_TMPL % emails}],
             temperature=0.1,
-            max_tokens=1000
+            max_tokens=EMAIL_ANALYSIS_MAX_TOKENS * len(email_texts),
+            stream_json=True,
+            use_cache=False,
+            prompt_tokens=prompt_tokens
+        )
+        # Split the response back out by email id
+        batch = EmailAnalysisBatchResult.model_validate_json(content)
+        by_id = {result.id: result for result in batch.results}
+    except Exception as e:
+        logger.warning("email_batch_failed", size=len(email_texts), error=str(e))
+    
+    missing = [i for i in range(len(email_texts)) if i not in by_id]
+    if missing:
+        retried = await asyncio.gather(
+            *[_analyze_one(client, email_texts[i], email_tokens[i]) for i in missing],
+            return_exceptions=True
         )
+        by_id.update(zip(missing, retried))
+    return [by_id[i] for i in range(len(email_texts))]
+
+_email_batcher = DynamicBatcher(_analyze_batch, EMAIL_BATCH_SIZE, EMAIL_BATCH_TIMEOUT_MS)
+
+# Emails longer than this would not fit in the context window alongside a full batch
+_BATCH_EMAIL_TOKENS = (MODEL_CONTEXT_TOKENS - EMAIL_BATCH_MAX_TOKENS - 1024) // EMAIL_BATCH_SIZE
+
+# Fields the extracted data must fill in before it counts as a complete task or meeting
+_TASK_FIELDS = ("task_description", "assigned_to", "deadline")
+_MEETING_FIELDS = ("organizer", "attendees", "proposed_dates", "duration")
+_PLACEHOLDERS = {"", "n/a", "na", "none", "null", "unknown", "tbd"}
+
+def _is_complete(data: Dict[str, Any], fields: Tuple[str, ...]) -> bool:
+    """Check that every field is filled in with something other than a placeholder."""
+    for field in fields:
+        value = data.get(field)
+        if not value or (isinstance(value, str) and value.strip().lower() in _PLACEHOLDERS):
+            return False
+    return True
+
+def _plan_actions(result: EmailAnalysisResult) -> List[Dict[str, Any]]:
+    """
+    Plan the actions an analyzed email calls for.
+    
+    Meeting and task emails get their classified action. If the extracted
+    data also carries a complete action of the other kind, e.g. a request to
+    meet about a piece of work with an owner and a deadline, that action is
+    added after it. Other emails get no actions.
+    
+    Args:
+        result: Analysis of the email
         
-        # Parse the response
-        content = response.choices[0].message.content
-        try:
-            result = json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            result = {
-                "analysis": content,
-                "action_type": "none",
-                "confidence": 0.5,
-                "extracted_data": {}
-            }
+    Returns:
+        List of planned actions with "type" and "data" keys
+    """
+    data = result.extracted_data
+    meeting = {"type": "schedule_meeting", "data": data}
+    task = {"type": "create_task", "data": data}
+    
+    if result.action_type == "meeting":
+        return [meeting, task] if _is_complete(data, _TASK_FIELDS) else [meeting]
+    if result.action_type == "task":
+        return [task, meeting] if _is_complete(data, _MEETING_FIELDS) else [task]
+    return []
+
+async def execute_action(client: AsyncOpenAI, action: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Carry out a planned action using the data extracted from the email.
+    
+    Args:
+        client: Shared OpenAI client
+        action: Planned action with "type" and "data" keys
         
-        # Determine actions based on analysis
-        actions = []
-        if result.get("action_type") == "meeting":
-            actions.append({
-                "type": "schedule_meeting",
-                "data": result.get("extracted_data", {})
-            })
-        elif result.get("action_type") == "task":
-            actions.append({
-                "type": "create_task",
-                "data": result.get("extracted_data", {})
-            })
+    Returns:
+        The action with either a "result" or an "error" key added
+    """
+    data = action["data"]
+    try:
+        if action["type"] == "create_task":
+            result = await create_task(client, TaskRequest(
+                description=data.get("task_description"),
+                assigned_to=data.get("assigned_to"),
+                deadline=data.get("deadline"),
+                priority=data.get("priority") or "Medium"
+            ))
+        else:
+            result = await schedule_meeting(client, MeetingRequest(
+                organizer=data.get("organizer"),
+                attendees=data.get("attendees") or [],
+                proposed_dates=data.get("proposed_dates") or [],
+                duration=data.get("duration")
+            ))
+    except Exception as e:
+        logger.error("action_failed", action=action["type"], error=str(e))
+        return {**action, "error": str(e)}
+    return {**action, "result": result}
+
+async def analyze_email(client: AsyncOpenAI, email_text: str) -> Dict[str, Any]:
+    """
+    Analyze email content using the fine-tuned GPT model to determine required actions.
+    
+    Args:
+        client: Shared OpenAI client
+        email_text: The full email text to analyze
+        
+    Returns:
+        Dictionary containing analysis and suggested actions
+    """
+    try:
+        email_text, tokens = _truncate_middle(email_text, MAX_INPUT_TOKENS)
+        
+        # Cache each email under its single-email prompt, whether or not it was batched
+        key = llm_cache.cache_key(MODEL_ID, _email_messages(email_text), 0.1)
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            result = EmailAnalysisResult.model_validate_json(cached)
+        else:
+            if tokens is not None and tokens > _BATCH_EMAIL_TOKENS:
+                result = await _analyze_one(client, email_text, tokens)
+            else:
+                result = await _email_batcher.submit((client, email_text, tokens))
+            await llm_cache.set(key, result.model_dump_json(exclude={"id"}))
         
         return {
-            "analysis": result.get("analysis", "Analysis completed"),
-            "actions": actions,
-            "confidence": result.get("confidence", 0.5)
+            "analysis": result.analysis,
+            "actions": _plan_actions(result),
+            "confidence": result.confidence
         }
         
     except Exception as e:
-        logger.error(f"Error in email analysis: {str(e)}")
+        logger.error("email_analysis_failed", error=str(e))
         return {
             "analysis": f"Error analyzing email: {str(e)}",
             "actions": [],
             "confidence": 0.0
         }
 
-async def create_task(task_request: TaskRequest) -> Dict[str, Any]:
+def _task_messages(task_request: TaskRequest) -> List[Dict[str, str]]:
+    """Build the task-enhancement prompt for a task request."""
+    return [
+        {"role": "user", "content": _TASK_ENHANCEMENT_TMPL.format_map({
+            "description": _truncate_middle(task_request.description, MAX_INPUT_TOKENS)[0],
+            "assigned_to": task_request.assigned_to,
+            "deadline": task_request.deadline,
+            "priority": task_request.priority
+        })}
+    ]
+
+def _task_record(task_request: TaskRequest, enhanced_description: str,
+                 task_id: Optional[str] = None, current_time: Optional[str] = None) -> Dict[str, Any]:
+    """Build the task response from a request and its enhanced description."""
+    task_id = task_id or uuid.uuid4().hex
+    current_time = current_time or datetime.now(timezone.utc).isoformat()
+    
+    return {
+        "id": task_id,
+        "description": enhanced_description,
+        "assigned_to": task_request.assigned_to,
+        "deadline": task_request.deadline,
+        "priority": task_request.priority.value,
+        "status": "To Do",
+        "created_at": current_time,
+        "updated_at": current_time
+    }
+
+async def create_task(client: AsyncOpenAI, task_request: TaskRequest) -> Dict[str, Any]:
     """
     Create a task using the AI model to enhance the task description.
     
     Args:
+        client: Shared OpenAI client
         task_request: TaskRequest object with task details
         
     Returns:
         Dictionary containing the created task information
     """
     try:
-        # Enhance task description using AI
-        enhancement_prompt = f"""Enhance this task description to be more specific and actionable:
-        
-        Original: {task_request.description}
-        Assigned to: {task_request.assigned_to}
-        Deadline: {task_request.deadline}
-        Priority: {task_request.priority}
-        
-        Provide an enhanced description that includes:
-        1. Clear objectives
-        2. Specific deliverables
-        3. Success criteria
-        4. Any dependencies or prerequisites
-        
-        Return only the enhanced description."""
-        
-        response = await asyncio.to_thread(
-            openai_client.chat.completions.create,
-            model=MODEL_ID,
-            messages=[
-                {"role": "user", "content": enhancement_prompt}
-            ],
+        content = await _complete(
+            client=client,
+            messages=_task_messages(task_request),
             temperature=0.3,
             max_tokens=500
         )
         
-        enhanced_description = response.choices[0].message.content.strip()
-        
         # Create task response
-        import uuid
-        from datetime import datetime
-        
-        task_id = str(uuid.uuid4())
-        current_time = datetime.now().isoformat()
-        
-        return {
-            "id": task_id,
-            "description": enhanced_description,
-            "assigned_to": task_request.assigned_to,
-            "deadline": task_request.deadline,
-            "priority": task_request.priority.value,
-            "status": "To Do",
-            "created_at": current_time,
-            "updated_at": current_time
-        }
+        return _task_record(task_request, content.strip())
         
     except Exception as e:
-        logger.error(f"Error creating task: {str(e)}")
+        logger.error("task_creation_failed", error=str(e))
         raise Exception(f"Failed to create task: {str(e)}")
 
-async def schedule_meeting(meeting_request: MeetingRequest) -> Dict[str, Any]:
+def _batch_state_path(input_file_id: str) -> str:
+    """Path of the saved task requests for a batch input file."""
+    return os.path.join(TASK_BATCH_DIR, f"{input_file_id}.json")
+
+def _write_batch_state(input_file_id: str, requests: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Save the (custom_id, task request) pairs of a batch, replacing the file atomically."""
+    os.makedirs(TASK_BATCH_DIR, exist_ok=True)
+    path = _batch_state_path(input_file_id)
+    with open(path + ".tmp", "wb") as f:
+        f.write(orjson.dumps(requests))
+    os.replace(path + ".tmp", path)
+
+def _read_batch_state(input_file_id: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+    """Load the saved (custom_id, task request) pairs of a batch, or None if there are none."""
+    try:
+        with open(_batch_state_path(input_file_id), "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+def _delete_batch_state(input_file_id: str) -> None:
+    """Remove the saved task requests of a batch once they are no longer needed."""
+    try:
+        os.remove(_batch_state_path(input_file_id))
+    except FileNotFoundError:
+        pass
+
+async def submit_task_batch(client: AsyncOpenAI, task_requests: List[TaskRequest]) -> Dict[str, Any]:
     """
-    Schedule a meeting using the AI model to optimize timing and provide recommendations.
+    Submit many tasks for creation through the OpenAI Batch API.
+    
+    The enhancement prompts are uploaded as a single JSONL batch, which is
+    billed at a lower rate but may take up to the 24h completion window to
+    finish. This returns once the batch is submitted; use get_task_batch to
+    collect the tasks. The request behind each custom_id is saved under
+    TASK_BATCH_DIR before the batch is created, so results can still be
+    matched to their requests after a restart.
     
     Args:
-        meeting_request: MeetingRequest object with meeting details
+        client: Shared OpenAI client
+        task_requests: TaskRequest objects to create tasks for
         
     Returns:
-        Dictionary containing meeting scheduling results
+        Dictionary with the batch id and status
     """
     try:
-        # Analyze meeting request and provide recommendations
-        analysis_prompt = f"""Analyze this meeting request and provide scheduling recommendations:
+        custom_ids = [uuid.uuid4().hex for _ in task_requests]
+        lines = [
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": MODEL_ID,
+                    "messages": _task_messages(task_request),
+                    "temperature": 0.3,
+                    "max_tokens": 500
+                }
+            })
+            for custom_id, task_request in zip(custom_ids, task_requests)
+        ]
         
-        Organizer: {meeting_request.organizer}
-        Attendees: {', '.join(meeting_request.attendees)}
-        Proposed dates: {', '.join(meeting_request.proposed_dates)}
-        Duration: {meeting_request.duration}
+        batch_file = await client.files.create(
+            file=("tasks.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        await asyncio.to_thread(_write_batch_state, batch_file.id, [
+            (custom_id, task_request.model_dump(mode="json"))
+            for custom_id, task_request in zip(custom_ids, task_requests)
+        ])
+        try:
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+        except Exception:
+            await asyncio.to_thread(_delete_batch_state, batch_file.id)
+            raise
+        logger.info("task_batch_submitted", batch_id=batch.id, size=len(task_requests))
         
-        Provide recommendations for:
-        1. Best meeting time from the proposed dates
-        2. Meeting agenda suggestions
-        3. Preparation requirements
-        4. Follow-up actions
+        return {"batch_id": batch.id, "status": batch.status}
         
-        Return as JSON:
-        {{
-            "recommendation": "analysis text",
-            "best_date": "YYYY-MM-DD",
-            "suggested_time": "HH:MM",
-            "agenda": ["item1", "item2"],
-            "preparation": ["prep1", "prep2"],
-            "follow_up": ["action1", "action2"]
-        }}"""
+    except Exception as e:
+        logger.error("task_batch_failed", error=str(e))
+        raise Exception(f"Failed to submit tasks in bulk: {str(e)}")
+
+async def get_task_batch(client: AsyncOpenAI, batch_id: str) -> Dict[str, Any]:
+    """
+    Check a bulk task batch and, once it has completed, build its tasks.
+    
+    Task ids are the batch custom_ids and created_at is the batch completion
+    time. The saved task requests are deleted once the tasks are built, or
+    once the batch fails, expires or is cancelled, so completed results can
+    be collected only once.
+    
+    Args:
+        client: Shared OpenAI client
+        batch_id: Id returned by submit_task_batch
         
-        response = await asyncio.to_thread(
-            openai_client.chat.completions.create,
-            model=MODEL_ID,
+    Returns:
+        Dictionary with the batch id and status; once completed, also the
+        created tasks in request order and the number of requests that failed
+        
+    Raises:
+        LookupError: If the batch completed but its task requests were not
+            saved by this deployment or its results were already collected
+    """
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status in ("failed", "expired", "cancelled"):
+        await asyncio.to_thread(_delete_batch_state, batch.input_file_id)
+    if batch.status != "completed":
+        return {"batch_id": batch.id, "status": batch.status}
+    
+    requests = await asyncio.to_thread(_read_batch_state, batch.input_file_id)
+    if requests is None:
+        raise LookupError(f"No saved task requests for batch {batch.id}; its results may already have been collected")
+    
+    # Match output lines back to their requests by custom_id
+    descriptions = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                descriptions[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    
+    completed_at = datetime.fromtimestamp(batch.completed_at or batch.created_at, timezone.utc).isoformat()
+    tasks = [
+        _task_record(TaskRequest(**request), descriptions[custom_id].strip(), custom_id, completed_at)
+        for custom_id, request in requests
+        if custom_id in descriptions
+    ]
+    await asyncio.to_thread(_delete_batch_state, batch.input_file_id)
+    return {
+        "batch_id": batch.id,
+        "status": batch.status,
+        "tasks": tasks,
+        "failed": len(requests) - len(tasks)
+    }
+
+async def schedule_meeting(client: AsyncOpenAI, meeting_request: MeetingRequest) -> Dict[str, Any]:
+    """
+    Schedule a meeting using the AI model to optimize timing and provide recommendations.
+    
+    Args:
+        client: Shared OpenAI client
+        meeting_request: MeetingRequest object with meeting details
+        
+    Returns:
+        Dictionary containing meeting scheduling results
+    """
+    try:
+        content = await _complete(
+            client=client,
             messages=[
-                {"role": "user", "content": analysis_prompt}
+                {"role": "user", "content": _MEETING_ANALYSIS_TMPL.format_map({
+                    "organizer": meeting_request.organizer,
+                    "attendees": ", ".join(meeting_request.attendees),
+                    "proposed_dates": ", ".join(meeting_request.proposed_dates),
+                    "duration": meeting_request.duration
+                })}
             ],
             temperature=0.2,
-            max_tokens=800
+            max_tokens=800,
+            stream_json=True
         )
         
-        content = response.choices[0].message.content
-        try:
-            analysis = json.loads(content)
-        except json.JSONDecodeError:
-            analysis = {
-                "recommendation": content,
-                "best_date": meeting_request.proposed_dates[0] if meeting_request.proposed_dates else "",
-                "suggested_time": "09:00",
-                "agenda": [],
-                "preparation": [],
-                "follow_up": []
-            }
+        analysis = MeetingAnalysisResult.model_validate_json(content)
         
         # Simulate calendar event creation
         event_details = {
             "summary": f"Meeting with {meeting_request.organizer}",
-            "description": analysis.get("recommendation", "Meeting scheduled"),
-            "start_time": f"{analysis.get('best_date', '')}T{analysis.get('suggested_time', '09:00')}:00",
-            "end_time": f"{analysis.get('best_date', '')}T{analysis.get('suggested_time', '09:00')}:00",
+            "description": analysis.recommendation,
+            "start_time": f"{analysis.best_date}T{analysis.suggested_time}:00",
+            "end_time": f"{analysis.best_date}T{analysis.suggested_time}:00",
             "attendees": meeting_request.attendees,
             "organizer": meeting_request.organizer
         }
         
         return {
-            "recommendation": analysis.get("recommendation", "Meeting analysis completed"),
+            "recommendation": analysis.recommendation,
             "event_created": True,
             "event_details": event_details,
             "scheduled_time": {
-                "date": analysis.get("best_date", ""),
-                "time": analysis.get("suggested_time", "09:00")
+                "date": analysis.best_date,
+                "time": analysis.suggested_time
             }
         }
         
     except Exception as e:
-        logger.error(f"Error scheduling meeting: {str(e)}")
+        logger.error("meeting_scheduling_failed", error=str(e))
         raise Exception(f"Failed to schedule meeting: {str(e)}")
 
-def categorize_email(email_text: str):
+async def categorize_email(client: AsyncOpenAI, email_text: str):
     """Categorize an email using the fine-tuned model."""
-    response = openai_client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=MODEL_ID,
         messages=[
             {"role": "system", "content": "You are an email categorization assistant."},
@@ -249,7 +690,7 @@ def categorize_email(email_text: str):
     )
     return response.choices[0].message.content.strip()
 
-def prioritize_task(task_data: TaskRequest):
+async def prioritize_task(client: AsyncOpenAI, task_data: TaskRequest):
     """Analyze and prioritize a task using the fine-tuned model."""
     task_info = (
         f"Description: {task_data.description}\n"
@@ -258,7 +699,7 @@ def prioritize_task(task_data: TaskRequest):
         f"Priority: {task_data.priority}"
     )
     
-    response = openai_client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=MODEL_ID,
         messages=[
             {"role": "system", "content": "You are a task prioritization assistant."},
@@ -0,0 +1,72 @@
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+import asyncio
+
+class DynamicBatcher:
+    """
+    Coalesces concurrent calls into batches for a batch handler.
+
+    Items submitted within timeout_ms of the first pending item, up to
+    batch_size of them, are passed to the handler together. Each batch runs in
+    its own task, so batches formed while another is in flight are not held up
+    behind it. The handler returns one result per item, in order; an exception
+    in place of a result is raised to that item's caller only.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]],
+                 batch_size: int, timeout_ms: float):
+        self._handler = handler
+        self._batch_size = batch_size
+        self._timeout = timeout_ms / 1000
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item for the next batch and wait for its result.
+
+        Args:
+            item: Item to pass to the handler
+
+        Returns:
+            The handler's result for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._timeout, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Start a task that runs the pending items as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        # Hold a reference so the task is not garbage collected while running
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Run the handler on a batch and resolve each caller's future."""
+        # Skip items whose callers were cancelled while waiting for the batch
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            results = await self._handler([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
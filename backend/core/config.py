@@ -1,6 +1,8 @@
 import os
+import tempfile
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+import httpx
 
 # Load environment variables
 load_dotenv()
@@ -10,10 +12,47 @@ API_TITLE = "Task Automator API"
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 CORS_ORIGINS = ["http://localhost:5173"]
+# Uvicorn's worker count; each worker process enforces its share of the concurrency cap
+WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY") or "1"))
+# Cap per endpoint across all workers
+MAX_CONCURRENT_REQUESTS = max(1, int(os.environ.get("MAX_CONCURRENT_REQUESTS", "32")) // WORKERS)
+BACKPRESSURE_TIMEOUT = float(os.environ.get("BACKPRESSURE_TIMEOUT", "30"))
 
 # OpenAI settings
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 MODEL_ID = "ft:gpt-3.5-turbo-0125:personal:task-automator-combined:BCsiqoAn"
+MODEL_CONTEXT_TOKENS = 16385
+MAX_INPUT_TOKENS = int(os.environ.get("MAX_INPUT_TOKENS", "8000"))
+TOKENIZER_LOAD_TIMEOUT = float(os.environ.get("TOKENIZER_LOAD_TIMEOUT", "30"))
+OPENAI_MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "1000"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "100"))
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "30"))
+# Where bulk task batches keep their submitted requests until results are collected;
+# point this at persistent storage if batches must survive a reboot
+TASK_BATCH_DIR = os.environ.get("TASK_BATCH_DIR") or os.path.join(tempfile.gettempdir(), "task-automator", "task_batches")
 
-# Initialize global OpenAI client
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
\ No newline at end of file
+# Email analysis batching settings
+EMAIL_ANALYSIS_MAX_TOKENS = 1000
+EMAIL_BATCH_MAX_TOKENS = 4096
+# Every email in a batch gets a full single-email answer budget, so cap the batch to what fits
+EMAIL_BATCH_SIZE = max(1, min(
+    int(os.environ.get("EMAIL_BATCH_SIZE", "4")),
+    EMAIL_BATCH_MAX_TOKENS // EMAIL_ANALYSIS_MAX_TOKENS
+))
+EMAIL_BATCH_TIMEOUT_MS = float(os.environ.get("EMAIL_BATCH_TIMEOUT_MS", "50"))
+
+# LLM response cache settings
+REDIS_URL = os.environ.get("REDIS_URL")
+LLM_CACHE_MAXSIZE = int(os.environ.get("LLM_CACHE_MAXSIZE", "1024"))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "3600"))
+
+def create_openai_client() -> AsyncOpenAI:
+    """Create the OpenAI client shared by all requests, backed by one pooled HTTP client."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=OPENAI_TIMEOUT
+    )
+    return AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
\ No newline at end of file
@@ -0,0 +1,74 @@
+from typing import Optional
+
+class JsonStreamScanner:
+    """
+    Incremental scanner that finds the end of the top-level JSON value in streamed text.
+
+    Each character is inspected exactly once, tracking string/escape state and
+    bracket depth, so the caller knows as soon as the model has emitted a
+    complete object or array without re-parsing the accumulated text.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._end: Optional[int] = None
+        self._length = 0
+        self.is_json: Optional[bool] = None
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level JSON value has been closed."""
+        return self._end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consume the next chunk of streamed text.
+
+        Args:
+            chunk: Text delta received from the model
+
+        Returns:
+            True if the top-level JSON value is now complete
+        """
+        self._parts.append(chunk)
+        if self.complete or self.is_json is False:
+            self._length += len(chunk)
+            return self.complete
+
+        for i, char in enumerate(chunk):
+            if self.is_json is None:
+                if char.isspace():
+                    continue
+                self.is_json = char in "{["
+                if not self.is_json:
+                    break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._length + i + 1
+                    break
+
+        self._length += len(chunk)
+        return self.complete
+
+    def text(self) -> str:
+        """Return the JSON value if complete, otherwise all text received so far."""
+        text = "".join(self._parts)
+        if self._end is not None:
+            return text[:self._end]
+        return text
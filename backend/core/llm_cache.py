@@ -0,0 +1,96 @@
+from .config import REDIS_URL, LLM_CACHE_MAXSIZE, LLM_CACHE_TTL
+from typing import Dict, List, Optional
+from cachetools import TTLCache
+import hashlib
+import orjson
+import structlog
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is an optional second-level cache
+    aioredis = None
+
+logger = structlog.get_logger(__name__)
+
+class LLMCache:
+    """
+    Exact-match response cache for chat completions.
+
+    Only the message content is stored, not the full SDK response object.
+    Responses are kept in an in-process TTL cache and, when a Redis URL is
+    configured, mirrored to Redis so that all workers share them. Only
+    near-deterministic calls (temperature <= max_temperature) are cached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600,
+                 redis_url: Optional[str] = None, max_temperature: float = 0.1):
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._ttl = ttl
+        self._max_temperature = max_temperature
+        self._redis = None
+        if redis_url:
+            if aioredis is None:
+                logger.warning("redis_unavailable", reason="REDIS_URL is set but the redis package is not installed")
+            else:
+                self._redis = aioredis.from_url(redis_url)
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(self, model: str, messages: List[Dict[str, str]], temperature: float) -> Optional[str]:
+        """Return the cache key for a completion, or None if the call should not be cached."""
+        if temperature > self._max_temperature:
+            return None
+        payload = orjson.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    async def get(self, key: Optional[str]) -> Optional[str]:
+        """Look up cached message content, checking the local cache before Redis."""
+        if key is None:
+            return None
+
+        value = self._local.get(key)
+        if value is None and self._redis is not None:
+            try:
+                raw = await self._redis.get(f"llm:{key}")
+            except Exception as e:
+                logger.warning("llm_cache_redis_get_failed", error=str(e))
+                raw = None
+            if raw is not None:
+                value = raw.decode("utf-8")
+                self._local[key] = value
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: Optional[str], value: str) -> None:
+        """Store message content in the local cache and, if configured, in Redis."""
+        if key is None:
+            return
+
+        self._local[key] = value
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"llm:{key}", value.encode("utf-8"), ex=self._ttl)
+            except Exception as e:
+                logger.warning("llm_cache_redis_set_failed", error=str(e))
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for the health endpoint."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._local)
+        }
+
+# Shared response cache
+llm_cache = LLMCache(
+    maxsize=LLM_CACHE_MAXSIZE,
+    ttl=LLM_CACHE_TTL,
+    redis_url=REDIS_URL
+)
@@ -22,6 +22,8 @@ class EmailRequest(BaseModel):
     email_text: str = Field(..., 
         description="Full email text including headers and body.",
         examples=["From: john@example.com\nSubject: Meeting Request\n\nCan we schedule a meeting for next week?"])
+    execute_actions: bool = Field(False,
+        description="Also create the tasks and schedule the meetings the email calls for.")
 
 class MeetingRequest(BaseModel):
     """Model for meeting scheduling requests."""
@@ -89,6 +91,13 @@ class TaskResponse(BaseModel):
     created_at: str
     updated_at: Optional[str] = None
 
+class TaskBatchResponse(BaseModel):
+    """Response model for bulk task creation through the Batch API."""
+    batch_id: str
+    status: str
+    tasks: Optional[List[TaskResponse]] = None
+    failed: int = 0
+
 class EmailProcessResponse(BaseModel):
     """Response model for email processing."""
     analysis: str
@@ -107,6 +116,28 @@ class EmailAnalysisResponse(BaseModel):
     actions_taken: List[Dict[str, Any]]
     timestamp: datetime
 
+# Structured model outputs parsed from JSON-mode completions
+class EmailAnalysisResult(BaseModel):
+    """Analysis of a single email as returned by the model."""
+    id: Optional[int] = None
+    analysis: str = "Analysis completed"
+    action_type: str = "none"
+    confidence: float = 0.5
+    extracted_data: Dict[str, Any] = Field(default_factory=dict)
+
+class EmailAnalysisBatchResult(BaseModel):
+    """Analyses of a batch of emails, keyed by email id."""
+    results: List[EmailAnalysisResult] = Field(default_factory=list)
+
+class MeetingAnalysisResult(BaseModel):
+    """Meeting scheduling recommendation as returned by the model."""
+    recommendation: str = "Meeting analysis completed"
+    best_date: str = ""
+    suggested_time: str = "09:00"
+    agenda: List[str] = Field(default_factory=list)
+    preparation: List[str] = Field(default_factory=list)
+    follow_up: List[str] = Field(default_factory=list)
+
 # Models moved from smart.py
 class SmartMeetingRequest(BaseModel):
     """Model for enhanced meeting scheduling requests with additional metadata."""
@@ -1,10 +1,25 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.core.config import API_TITLE, CORS_ORIGINS, API_HOST, API_PORT
+from fastapi.responses import ORJSONResponse
+from backend.core.ai import load_tokenizer
+from backend.core.config import API_TITLE, CORS_ORIGINS, API_HOST, API_PORT, create_openai_client
 from backend.api.router import api_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared OpenAI client and start loading the tokenizer on startup; close the connection pool on shutdown."""
+    app.state.openai = create_openai_client()
+    # Requests are served while the tokenizer loads, just without local token budgeting;
+    # /health/ready reports 503 until the load has finished or given up
+    app.state.tokenizer_loader = asyncio.create_task(load_tokenizer())
+    yield
+    app.state.tokenizer_loader.cancel()
+    await app.state.openai.close()
+
 # Initialize the FastAPI app
-app = FastAPI(title=API_TITLE)
+app = FastAPI(title=API_TITLE, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -3,76 +3,82 @@
 Run script for Task Automator project
 """
 
+import asyncio
 import os
-import subprocess
-import sys
-import time
 import signal
-import threading
+import sys
+
+BACKEND_COMMAND = [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "0.0.0.0", "--port", "8000"]
+if os.environ.get("DEV") == "1":
+    # Auto-reload is only available with a single worker
+    BACKEND_COMMAND += ["--reload"]
+else:
+    WORKERS = os.environ.get("WORKERS", str(os.cpu_count() or 1))
+    # The API reads WEB_CONCURRENCY to split its concurrency limits between workers
+    os.environ["WEB_CONCURRENCY"] = WORKERS
+    BACKEND_COMMAND += [
+        "--workers", WORKERS,
+        "--loop", "uvloop",
+        "--http", "httptools",
+        "--no-access-log",
+    ]
 
-processes = []
+_out = sys.stdout.buffer
 
-def signal_handler(signum, frame):
-    print("\nShutting down all services...")
+def log(message):
+    """Write a line straight to the stdout buffer and flush it."""
+    _out.write(f"{message}\n".encode())
+    _out.flush()
+
+# (name, command, working directory) for each service, in start order
+SERVICES = [
+    ("Python Backend", BACKEND_COMMAND, None),
+    ("Dashboard Backend", ["npm", "start"], "dashboard/backend"),
+    ("Dashboard Frontend", ["npm", "run", "dev"], "dashboard/frontend"),
+]
+
+async def run_service(command, cwd=None, name="Service"):
+    """Start a service process directly, without an intermediate shell."""
+    try:
+        log(f"Starting {name}...")
+        return await asyncio.create_subprocess_exec(*command, cwd=cwd)
+    except Exception as e:
+        log(f"Error running {name}: {e}")
+        return None
+
+def shutdown(processes, stopping):
+    """Terminate all running services."""
+    log("\nShutting down all services...")
+    stopping.set()
     for process in processes:
-        if process and process.poll() is None:
+        if process.returncode is None:
             process.terminate()
-    sys.exit(0)
 
-def run_service(command, cwd=None, name="Service"):
-    def run():
-        try:
-            print(f"Starting {name}...")
-            process = subprocess.Popen(command, shell=True, cwd=cwd)
+async def main():
+    log("Task Automator - Starting all services...")
+
+    processes = []
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown, processes, stopping)
+
+    for i, (name, command, cwd) in enumerate(SERVICES):
+        if i:
+            await asyncio.sleep(3)
+        if stopping.is_set():
+            break
+        process = await run_service(command, cwd=cwd, name=name)
+        if process is not None:
             processes.append(process)
-            process.wait()
-        except Exception as e:
-            print(f"Error running {name}: {e}")
-    
-    thread = threading.Thread(target=run, daemon=True)
-    thread.start()
-    return thread
 
-def main():
-    print("Task Automator - Starting all services...")
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Start Python backend
-    python_backend_thread = run_service(
-        "python -m uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload",
-        name="Python Backend"
-    )
-    
-    time.sleep(3)
-    
-    # Start dashboard backend
-    dashboard_backend_thread = run_service(
-        "npm start",
-        cwd="dashboard/backend",
-        name="Dashboard Backend"
-    )
-    
-    time.sleep(3)
-    
-    # Start dashboard frontend
-    dashboard_frontend_thread = run_service(
-        "npm run dev",
-        cwd="dashboard/frontend",
-        name="Dashboard Frontend"
-    )
-    
-    print("\nAll services started!")
-    print("Dashboard: http://localhost:5173")
-    print("API: http://localhost:8000")
-    print("Press Ctrl+C to stop")
-    
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        signal_handler(signal.SIGINT, None)
+    if not stopping.is_set():
+        log("\nAll services started!")
+        log("Dashboard: http://localhost:5173")
+        log("API: http://localhost:8000")
+        log("Press Ctrl+C to stop")
+
+    await asyncio.gather(*[process.wait() for process in processes])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())